@@ -1,17 +1,26 @@
 # run.py
+import os
 import threading
 import time
-from src.core.ai_control_system import AIControlSystem
-from src.web.app import app
+
+# The AI system and web app are imported inside the run functions: the analysis worker is
+# spawned and re-imports this module, and must not build its own file tracker or Flask app.
 
 def run_ai_system():
     """Run the AI control system in a separate thread."""
+    from src.core.ai_control_system import AIControlSystem
     ai_system = AIControlSystem()
     ai_system.run()
 
 def run_web_server():
     """Run the Flask web server for visualization."""
-    app.run(host='0.0.0.0', port=8080, debug=True, use_reloader=True)
+    from src.web.app import app
+    if os.getenv('FLASK_ENV') == 'development':
+        # The reloader would spawn a second process running another AI system and consumer
+        app.run(host='0.0.0.0', port=8080, debug=True, use_reloader=False)
+    else:
+        from waitress import serve
+        serve(app, host='0.0.0.0', port=8080, threads=8)
 
 if __name__ == "__main__":
     # Start AI system in a separate thread
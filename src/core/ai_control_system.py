@@ -1,13 +1,20 @@
-import json
+import collections
+import functools
+import logging
+import multiprocessing
 import os
 import threading
-import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from queue import Queue
 from typing import Any, Dict, List
 
+import orjson
 import pika
 import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+from urllib3.util.retry import Retry
 
 from src.config.settings import NODERED_ENDPOINT, QUEUE_CONFIG, RABBITMQ_CONFIG
 from src.utils.logger import setup_logger
@@ -15,12 +22,6 @@ from src.utils.logger import setup_logger
 from .file_tracker import file_tracker
 from .task_analyzer import TaskAnalyzer
 
-# File access lock to prevent concurrent read/write operations
-file_lock = threading.Lock()
-
-# Global task processing lock - This ensures only one task is processed at a time
-global_task_lock = threading.Lock()
-
 # Order data file path
 ORDER_DATA_FILE = "order_data.json"
 
@@ -28,6 +29,24 @@ ORDER_DATA_FILE = "order_data.json"
 PING_API = "http://nsu.owon.kr/api/ai/ping"
 UPLOAD_API = "http://nsu.owon.kr/api/ai/upload"
 
+# Upload file type by lowercase file extension, used for logging
+FILE_TYPE_MAP = {
+    ".jpg": "IMAGE",
+    ".jpeg": "IMAGE",
+    ".png": "IMAGE",
+    ".bmp": "IMAGE",
+    ".tiff": "IMAGE",
+    ".mp4": "VIDEO",
+    ".avi": "VIDEO",
+    ".mov": "VIDEO",
+    ".wmv": "VIDEO",
+    ".flv": "VIDEO",
+}
+
+# Interval between status pings in seconds
+PING_INTERVAL = 60
+PING_TIMEOUT = 5  # Seconds; keeps a hung ping endpoint from tying up the ping pool
+
 # PING_API = "http://192.168.1.104/api/ai/ping"
 # UPLOAD_API = "http://192.168.1.104/api/ai/upload"
 
@@ -52,6 +71,38 @@ NODE_RED_CONFIG = [
 # Extract queue names for easier access
 NODE_RED_QUEUES = [config["queue"] for config in NODE_RED_CONFIG]
 
+WEB_TO_AI_CONFIG = {
+    "queue": os.getenv("WEB_TO_AI_QUEUE", "WEB_TO_AI"),
+    "routing_key": os.getenv("WEB_TO_AI_ROUTING_KEY", "WEB_TO_AI_KEY"),
+    "exchange": os.getenv("WEB_TO_AI_EXCHANGE", "NSU"),
+    "exchange_type": os.getenv("WEB_TO_AI_EXCHANGE_TYPE", "direct"),
+}
+
+# Maximum number of tasks waiting in the global processing queue before messages are requeued
+MAX_INFLIGHT = int(os.getenv("MAX_INFLIGHT", "64"))
+
+# Delay in seconds before a requeued message (full queue, failed save) is handed back to the broker
+REQUEUE_DELAY = 1
+
+# Fields every WEB_TO_AI order message must contain
+REQUIRED_FIELDS = frozenset(("ORDER_NO", "ITEM_CD", "ITEM_NM", "ITEM_CLASS", "BOM", "RECIPE"))
+
+# Number of unacknowledged messages the broker may deliver ahead of the callbacks.
+# Keep PREFETCH x average handling time below the broker's consumer ack timeout.
+PREFETCH_COUNT = int(os.getenv("PREFETCH", "32"))
+
+
+def _new_analysis_pool() -> ProcessPoolExecutor:
+    """
+    Create the single-worker analysis process pool.
+
+    The worker is spawned rather than forked: threads started at import time (the log
+    listener, the frame mirror writer) do not survive a fork, and with spawn the worker
+    only imports the analyzer modules it unpickles, never this module or the web app,
+    so it has no file tracker of its own.
+    """
+    return ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
 
 class AIControlSystem:
     def __init__(self):
@@ -74,6 +125,18 @@ class AIControlSystem:
 
         self.nodered_endpoint = NODERED_ENDPOINT
 
+        # Pooled HTTP session so ping, upload and Node-RED requests reuse TCP connections
+        self.http = requests.Session()
+        http_adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=Retry(total=2, backoff_factor=0.2))
+        self.http.mount("http://", http_adapter)
+        self.http.mount("https://", http_adapter)
+
+        # Small pool that sends status pings off the timer thread
+        self._ping_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ping")
+
+        # Single thread that parses and stores WEB_TO_AI messages in arrival order
+        self._web_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="web")
+
         # Store Node-RED configuration
         self.node_red_config = NODE_RED_CONFIG
 
@@ -85,14 +148,21 @@ class AIControlSystem:
             "FORDING": TaskAnalyzer.folding_task_analysis,
             "FINAL": TaskAnalyzer.final_check_task_analysis,
         }
-        self.task_analysis_map.setdefault("unknown_task", lambda _: {"status": "ERROR", "details": "Unknown task"})
+        # Fallback analyzer for task names missing from the map
+        self._unknown_analyzer = TaskAnalyzer.unknown_task_analysis
+
+        # Analyzers run in a separate process so vision work does not hold this process's GIL.
+        # A single worker keeps FIFO order and keeps TaskAnalyzer's class state (last folding
+        # result, cached models) in one place across tasks.
+        self._analysis_pool = _new_analysis_pool()
 
         # Single global processing queue for all tasks
-        self.global_processing_queue = Queue()
+        # deque append/popleft are atomic, so producers only need to set the event afterwards
+        self.global_processing_queue = collections.deque()
+        self._queue_not_empty = threading.Event()
 
-        # Flag to indicate if a task is currently being processed
-        self.is_processing = False
-        self.processing_lock = threading.Lock()
+        # Set while the worker is processing a task; the single-consumer queue serializes tasks
+        self._busy = threading.Event()
 
         # Task statuses for ping updates
         self.task_statuses = {
@@ -106,73 +176,145 @@ class AIControlSystem:
         # Status update lock
         self.status_lock = threading.Lock()
 
+        # In-memory copy of the order data, kept in sync with ORDER_DATA_FILE on write
+        self._order_cache: Dict[str, Any] = {}
+        self._order_cache_lock = threading.Lock()
+
         # Create empty order data file if it doesn't exist
         self._ensure_order_data_file_exists()
 
     def _ensure_order_data_file_exists(self):
         """
-        Create an empty order data file if it doesn't exist
+        Create an empty order data file if it doesn't exist and load it into the order cache
         """
-        if not os.path.exists(ORDER_DATA_FILE):
-            with open(ORDER_DATA_FILE, "w") as file:
-                json.dump({}, file)
-            self.logger.info(f"Created empty order data file: {ORDER_DATA_FILE}")
+        try:
+            # Exclusive create: fails instead of truncating when the file already exists
+            with open(ORDER_DATA_FILE, "xb") as file:
+                file.write(orjson.dumps({}))
+            self.logger.info("Created empty order data file: %s", ORDER_DATA_FILE)
+        except FileExistsError:
+            pass
+
+        with self._order_cache_lock:
+            self._order_cache = self._load_order_data_file()
 
     def connect_to_rabbitmq(self):
         """
         Establish connection to RabbitMQ server
         RabbitMQ server: WEB_TO_AI 접근
+
+        The connection is asynchronous: channel setup, exchange/queue declaration and
+        consumer registration run as callbacks once consume_messages starts the IO loop.
         """
         try:
-            self.connection = pika.BlockingConnection(self.connection_params)
-            self.channel = self.connection.channel()
-
-            # Declare WEB_TO_AI exchange and queue
-            self.channel.exchange_declare(
-                exchange=os.getenv("WEB_TO_AI_EXCHANGE", "NSU"),
-                exchange_type=os.getenv("WEB_TO_AI_EXCHANGE_TYPE", "direct"),
-            )
-            self.channel.queue_declare(
-                queue=os.getenv("WEB_TO_AI_QUEUE", "WEB_TO_AI"),
-                durable=True,
-            )
-            self.channel.queue_bind(
-                exchange=os.getenv("WEB_TO_AI_EXCHANGE", "NSU"),
-                queue=os.getenv("WEB_TO_AI_QUEUE", "WEB_TO_AI"),
-                routing_key=os.getenv("WEB_TO_AI_ROUTING_KEY", "WEB_TO_AI_KEY"),
+            self._connection_error = None
+            self._closing = False
+            self.connection = pika.SelectConnection(
+                parameters=self.connection_params,
+                on_open_callback=self._on_connection_open,
+                on_open_error_callback=self._on_connection_open_error,
+                on_close_callback=self._on_connection_closed,
             )
+        except Exception as e:
+            self.logger.error("Failed to connect to RabbitMQ: %s", e)
+            raise
 
-            # self.channel.exchange_declare(exchange="NSU_NODERED_FAN", exchange_type="fanout")
-            # self.channel.queue_declare(queue="WEB_TO_AI", durable=True)
-            # self.channel.queue_bind(exchange="NSU_NODERED_FAN", queue="WEB_TO_AI", routing_key="WEB_TO_AI_KEY")
+    def _on_connection_open(self, connection: pika.SelectConnection):
+        """
+        Open a channel once the connection to RabbitMQ is established
+        """
+        connection.channel(on_open_callback=self._on_channel_open)
 
-            # Declare Node-RED exchanges and queues based on configuration
-            for config in self.node_red_config:
-                # Declare exchange
-                self.channel.exchange_declare(
-                    exchange=config["exchange"],
-                    exchange_type=config["exchange_type"],
-                )
+    def _on_connection_open_error(self, connection: pika.SelectConnection, error: Exception):
+        """
+        Stop the IO loop when the connection to RabbitMQ cannot be established
+        """
+        self.logger.error("Failed to connect to RabbitMQ: %s", error)
+        self._connection_error = error
+        connection.ioloop.stop()
 
-                # Declare queue
-                self.channel.queue_declare(
-                    queue=config["queue"],
-                    durable=True,
-                )
+    def _on_connection_closed(self, connection: pika.SelectConnection, reason: Exception):
+        """
+        Stop the IO loop when the connection is closed, remembering unexpected closes
+        """
+        if not self._closing:
+            self.logger.error("RabbitMQ connection closed unexpectedly: %s", reason)
+            self._connection_error = reason
+        connection.ioloop.stop()
 
-                # Bind queue to exchange with routing key
-                self.channel.queue_bind(
-                    exchange=config["exchange"],
-                    queue=config["queue"],
-                    routing_key=config["routing_key"],
-                )
+    def _on_channel_open(self, channel):
+        """
+        Configure prefetch on the new channel before declaring exchanges and queues
+        """
+        self.channel = channel
+        self.channel.add_on_close_callback(self._on_channel_closed)
+        self.channel.basic_qos(prefetch_count=PREFETCH_COUNT, callback=self._on_basic_qos_ok)
+
+    def _on_channel_closed(self, channel, reason: Exception):
+        """
+        Close the connection when the broker closes the channel (e.g. a failed declaration)
+        """
+        self.logger.error("RabbitMQ channel closed: %s", reason)
+        if not self.connection.is_closing and not self.connection.is_closed:
+            self.connection.close()
 
-                self.logger.info(f"Declared and bound queue {config['queue']} to exchange {config['exchange']}")
+    def _on_basic_qos_ok(self, _frame):
+        """
+        Declare the WEB_TO_AI and Node-RED exchanges and queues
+        """
+        # self.channel.exchange_declare(exchange="NSU_NODERED_FAN", exchange_type="fanout")
+        # self.channel.queue_declare(queue="WEB_TO_AI", durable=True)
+        # self.channel.queue_bind(exchange="NSU_NODERED_FAN", queue="WEB_TO_AI", routing_key="WEB_TO_AI_KEY")
+        self._declare_bindings([WEB_TO_AI_CONFIG, *self.node_red_config])
+
+    def _declare_bindings(self, bindings: List[Dict[str, str]]):
+        """
+        Declare the exchange, queue and binding of the first configuration, then continue with the rest
 
+        :param bindings: Remaining queue/exchange configurations to declare
+        """
+        if not bindings:
             self.logger.info("Connected to RabbitMQ successfully")
-        except Exception as e:
-            self.logger.error(f"Failed to connect to RabbitMQ: {e}")
-            raise
+            self._start_consumers()
+            return
+
+        config = bindings[0]
+        self.channel.exchange_declare(
+            exchange=config["exchange"],
+            exchange_type=config["exchange_type"],
+            callback=functools.partial(self._on_exchange_declare_ok, bindings),
+        )
+
+    def _on_exchange_declare_ok(self, bindings: List[Dict[str, str]], _frame):
+        """
+        Declare the queue once its exchange exists
+        """
+        config = bindings[0]
+        self.channel.queue_declare(
+            queue=config["queue"],
+            durable=True,
+            callback=functools.partial(self._on_queue_declare_ok, bindings),
+        )
+
+    def _on_queue_declare_ok(self, bindings: List[Dict[str, str]], _frame):
+        """
+        Bind the declared queue to its exchange
+        """
+        config = bindings[0]
+        self.channel.queue_bind(
+            exchange=config["exchange"],
+            queue=config["queue"],
+            routing_key=config["routing_key"],
+            callback=functools.partial(self._on_queue_bind_ok, bindings),
+        )
+
+    def _on_queue_bind_ok(self, bindings: List[Dict[str, str]], _frame):
+        """
+        Continue with the next configuration once the binding is in place
+        """
+        config = bindings[0]
+        self.logger.info("Declared and bound queue %s to exchange %s", config['queue'], config['exchange'])
+        self._declare_bindings(bindings[1:])
 
     def process_web_message(self, message_data: Dict[str, Any]):
         """
@@ -182,47 +324,69 @@ class AIControlSystem:
         """
         try:
             # Validate required fields
-            required_fields = ["ORDER_NO", "ITEM_CD", "ITEM_NM", "ITEM_CLASS", "BOM", "RECIPE"]
-            for field in required_fields:
-                if field not in message_data:
-                    raise ValueError(f"Missing required field: {field}")
+            missing_fields = REQUIRED_FIELDS.difference(message_data)
+            if missing_fields:
+                raise ValueError(f"Missing required fields: {sorted(missing_fields)}")
+
+            # Save the order data via a temp file and atomic rename so readers never see a partial file
+            order_bytes = orjson.dumps(message_data, option=orjson.OPT_INDENT_2)
+            tmp_file = ORDER_DATA_FILE + ".tmp"
+            with open(tmp_file, "wb") as json_file:
+                json_file.write(order_bytes)
+            os.replace(tmp_file, ORDER_DATA_FILE)
 
-            # Save the order data as a JSON file with thread safety
-            with file_lock:
-                with open(ORDER_DATA_FILE, "w") as json_file:
-                    json.dump(message_data, json_file, indent=4)
+            with self._order_cache_lock:
+                self._order_cache = dict(message_data)
 
-            self.logger.info(f"Updated order data: {message_data['ORDER_NO']}")
+            self.logger.info("Updated order data: %s", message_data['ORDER_NO'])
 
             # Log detailed information
-            self.logger.info(
-                f"Order details - Item: {message_data['ITEM_NM']}, " f"Class: {message_data['ITEM_CLASS']}, " f"BOM Count: {len(message_data['BOM'])}, " f"Recipe Count: {len(message_data['RECIPE'])}"
-            )
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info(
+                    "Order details - Item: %s, Class: %s, BOM Count: %d, Recipe Count: %d",
+                    message_data["ITEM_NM"],
+                    message_data["ITEM_CLASS"],
+                    len(message_data["BOM"]),
+                    len(message_data["RECIPE"]),
+                )
 
         except Exception as e:
-            self.logger.error(f"Error processing web message: {e}")
+            self.logger.error("Error processing web message: %s", e)
             raise
 
     def get_current_order_data(self) -> Dict[str, Any]:
         """
-        Get the current order data from file
+        Get the current order data from the in-memory cache
 
         :return: Current order data dictionary
         """
+        with self._order_cache_lock:
+            return self._order_cache.copy()
+
+    def _load_order_data_file(self) -> Dict[str, Any]:
+        """
+        Read the order data from file
+
+        :return: Order data dictionary stored on disk
+        """
         try:
-            with file_lock:
-                # Check if file exists and has content
-                if os.path.exists(ORDER_DATA_FILE) and os.path.getsize(ORDER_DATA_FILE) > 0:
-                    with open(ORDER_DATA_FILE, "r") as json_file:
-                        return json.load(json_file)
-                else:
-                    self.logger.warning("Order data file empty or not found")
-                    return {}
-        except json.JSONDecodeError:
-            self.logger.error("Invalid JSON in order data file")
+            with open(ORDER_DATA_FILE, "rb") as json_file:
+                order_bytes = json_file.read()
+        except FileNotFoundError:
+            self.logger.warning("Order data file empty or not found")
             return {}
         except Exception as e:
-            self.logger.error(f"Error reading order data file: {e}")
+            self.logger.error("Error reading order data file: %s", e)
+            return {}
+
+        if not order_bytes:
+            self.logger.warning("Order data file empty or not found")
+            return {}
+
+        try:
+            return orjson.loads(order_bytes)
+        except orjson.JSONDecodeError:
+            self.logger.error("Invalid JSON in order data file")
             return {}
 
     def update_task_status(self, task_type: str, status: str):
@@ -237,7 +401,7 @@ class AIControlSystem:
                 self.task_statuses[task_type]["status"] = status
                 # Increment index for each status change
                 self.task_statuses[task_type]["index"] += 1
-                self.logger.info(f"Updated {task_type} status to {status}")
+                self.logger.info("Updated %s status to %s", task_type, status)
 
     def upload_file(self, file_path: str, task_type: str, details: str, order_no: str = "UNKNOWN") -> bool:
         """
@@ -250,82 +414,96 @@ class AIControlSystem:
         """
         try:
             if not os.path.exists(file_path):
-                self.logger.error(f"File not found: {file_path}")
+                self.logger.error("File not found: %s", file_path)
                 return False
 
             # Get file information for logging
             file_size = os.path.getsize(file_path)
             file_extension = os.path.splitext(file_path)[1].lower()
-            file_type = ""
 
             # Identify file type for enhanced logging
-            if file_extension in [".jpg", ".jpeg", ".png", ".bmp", ".tiff"]:
-                file_type = "IMAGE"
-            elif file_extension in [".mp4", ".avi", ".mov", ".wmv", ".flv"]:
-                file_type = "VIDEO"
-            else:
-                file_type = "FILE"
+            file_type = FILE_TYPE_MAP.get(file_extension, "FILE")
 
             # Log upload attempt with detailed information
-            self.logger.info(f"Uploading {file_type}: {file_path} ({file_size/1024:.2f} KB) for task {task_type}")
+            self.logger.info("Uploading %s: %s (%.2f KB) for task %s", file_type, file_path, file_size/1024, task_type)
 
             with open(file_path, "rb") as file:
                 # Prepare multipart/form-data fields according to API specification
-                files = {"file": file}
-                data = {
-                    "AI_TASK": task_type,
-                    "ORDER_NO": order_no,
-                    "QC_CODE": details,
-                }
+                multipart = MultipartEncoder(
+                    fields={
+                        "AI_TASK": task_type,
+                        "ORDER_NO": order_no,
+                        "QC_CODE": str(details),
+                        "file": (os.path.basename(file_path), file, "application/octet-stream"),
+                    }
+                )
 
-                # Send POST request with multipart/form-data
-                response = requests.post(UPLOAD_API, files=files, data=data)
+                # Send POST request with multipart/form-data, streaming the file from disk
+                response = self.http.post(UPLOAD_API, data=multipart, headers={"Content-Type": multipart.content_type}, timeout=(5, 60))
 
                 if response.status_code == 200:
-                    success_message = f"Successfully uploaded {file_type} {file_path} for {task_type}, order: {order_no}"
-                    self.logger.info(success_message)
+                    self.logger.info("Successfully uploaded %s %s for %s, order: %s", file_type, file_path, task_type, order_no)
                     return True
                 else:
-                    error_message = f"Failed to upload {file_type}: {response.status_code} - {response.text}"
-                    self.logger.error(error_message)
+                    self.logger.error("Failed to upload %s: %s - %s", file_type, response.status_code, response.text)
                     return False
 
         except Exception as e:
-            error_message = f"Error uploading file {file_path}: {e}"
-            self.logger.error(error_message)
+            self.logger.error("Error uploading file %s: %s", file_path, e)
             return False
 
-    def ping_status_worker(self):
+    def _schedule_ping(self):
         """
-        Worker thread that sends periodic status updates to the API
+        Arm a timer that emits the next round of status pings after PING_INTERVAL seconds
         """
-        self.logger.info("Started ping status worker thread")
-        while True:
-            try:
-                # Current timestamp in the required format
-                current_time = datetime.now().strftime("%Y-%m-%d")
-
-                # Send individual ping for each task type
-                with self.status_lock:
-                    for task_type, status_info in self.task_statuses.items():
-                        # Prepare ping data according to API specification
-                        ping_data = {"AI_TASK": task_type, "TIME": current_time, "PING": True}
-
-                        # Send ping to API
-                        response = requests.post(PING_API, json=ping_data, headers={"Content-Type": "application/json"})
-
-                        if response.status_code == 200:
-                            # Log ping status with INFO level for better visibility
-                            ping_message = f"Ping status update for {task_type}: {status_info['status']}"
-                            # self.logger.info(ping_message)
-                        else:
-                            self.logger.warning(f"Ping status update for {task_type} failed: {response.status_code} - {response.text}")
+        timer = threading.Timer(PING_INTERVAL, self._emit_pings)
+        timer.daemon = True
+        timer.start()
 
-            except Exception as e:
-                self.logger.error(f"Error in ping status worker: {e}")
+    def _emit_pings(self):
+        """
+        Submit a status ping for each task type to the ping pool and re-arm the ping timer
+        """
+        try:
+            # Current timestamp in the required format
+            current_time = datetime.now().strftime("%Y-%m-%d")
+
+            # Snapshot statuses so the lock is not held during the HTTP requests
+            with self.status_lock:
+                snapshot = [(task_type, status_info["status"]) for task_type, status_info in self.task_statuses.items()]
+
+            # Send individual ping for each task type
+            for task_type, status in snapshot:
+                # Prepare ping data according to API specification
+                ping_data = {"AI_TASK": task_type, "TIME": current_time, "PING": True}
 
-            # Sleep for 1 second before next ping (changed from 5 seconds)
-            time.sleep(60)
+                # Send ping to API without blocking the timer thread
+                future = self._ping_pool.submit(self.http.post, PING_API, json=ping_data, headers={"Content-Type": "application/json"}, timeout=PING_TIMEOUT)
+                future.add_done_callback(functools.partial(self._on_ping_done, task_type, status))
+
+        except Exception as e:
+            self.logger.error("Error in ping status worker: %s", e)
+
+        finally:
+            self._schedule_ping()
+
+    def _on_ping_done(self, task_type: str, status: str, future: Future):
+        """
+        Log the outcome of a single status ping
+
+        :param task_type: Type of task the ping was sent for
+        :param status: Task status at the time the ping was sent
+        :param future: Completed future holding the ping response
+        """
+        try:
+            response = future.result()
+        except Exception as e:
+            self.logger.error("Error sending ping for %s: %s", task_type, e)
+            return
+
+        if response.status_code != 200:
+            self.logger.warning("Ping status update for %s failed: %s - %s", task_type, response.status_code, response.text)
+        # else: self.logger.info("Ping status update for %s: %s", task_type, status)
 
     def process_task_analysis(self, task_request: Dict[str, Any]) -> Dict[str, str]:
         """
@@ -341,22 +519,28 @@ class AIControlSystem:
             self.update_task_status(task_name, "RUNNING")
 
             # Get the appropriate analysis method
-            analysis_method = self.task_analysis_map.get(task_name, self.task_analysis_map["unknown_task"])
+            analysis_method = self.task_analysis_map.get(task_name, self._unknown_analyzer)
 
-            # Read the current order data from file
+            # Current order data from the in-memory cache; the analysis process does not read the file
             order_data = self.get_current_order_data()
 
             # Include current order data in analysis if available
             task_data = {"order_data": order_data, "task_request": task_request}
 
             # Process the task with the global lock to ensure only one task runs at a time
-            self.logger.info(f"Starting task analysis for {task_name}")
+            self.logger.info("Starting task analysis for %s", task_name)
 
             # Perform the specific task analysis
-            analysis_result = analysis_method(task_data)
+            try:
+                analysis_result = self._analysis_pool.submit(analysis_method, task_data).result()
+            except BrokenProcessPool:
+                # Replace the dead pool so the next task gets a fresh analysis process
+                self._analysis_pool = _new_analysis_pool()
+                self._analysis_pool.submit(TaskAnalyzer.warm_up)
+                raise
             # CASE, BOX, COVER, FOLDING, FINAL(ROBOT)
 
-            self.logger.info(f"Completed task analysis for {task_name}")
+            self.logger.info("Completed task analysis for %s", task_name)
 
             # Check if the result contains a saved file path and upload it : 이미지 저장장
             if "saved_file_path" in analysis_result and analysis_result["saved_file_path"]:
@@ -385,14 +569,14 @@ class AIControlSystem:
             else:
                 self.update_task_status(task_name, "ERROR")
 
-            self.logger.info(f"Task analysis completed: {result}")
+            self.logger.info("Task analysis completed: %s", result)
             return result
 
         except Exception as e:
             # Update task status to ERROR if an exception occurs
             self.update_task_status(task_name, "ERROR")
 
-            self.logger.error(f"Error processing task analysis: {e}")
+            self.logger.error("Error processing task analysis: %s", e)
             return {"NAME": task_name, "RESULT": "ERROR", "ORDER_NO": "UNKNOWN", "CONFIDENCE": "0%", "DETAILS": f"Error: {str(e)}"}
 
     def send_result_to_node_red(self, result: Dict[str, Any]):
@@ -404,14 +588,38 @@ class AIControlSystem:
         try:
             print(result)
             # Use the stored Node-RED endpoint
-            response = requests.post(self.nodered_endpoint, json=result, timeout=5)
+            response = self.http.post(self.nodered_endpoint, json=result, timeout=5)
             response.raise_for_status()
-            self.logger.info(f"Results sent to Node-RED successfully: {result}")
+            self.logger.info("Results sent to Node-RED successfully: %s", result)
 
         except requests.RequestException as e:
-            self.logger.error(f"Failed to send results to Node-RED: {e}")
+            self.logger.error("Failed to send results to Node-RED: %s", e)
             raise
 
+    def _enqueue_task(self, body: bytes):
+        """
+        Add a raw task request to the global processing queue and wake the worker
+
+        :param body: Undecoded JSON task request as received from RabbitMQ
+        """
+        self.global_processing_queue.append(body)
+        self._queue_not_empty.set()
+
+    def _next_task(self) -> bytes:
+        """
+        Block until a task is available and pop it from the global processing queue
+
+        :return: Oldest queued raw task request
+        """
+        while True:
+            try:
+                return self.global_processing_queue.popleft()
+            except IndexError:
+                self._queue_not_empty.clear()
+                # Re-check after clearing so an append racing with clear() is not missed
+                if not self.global_processing_queue:
+                    self._queue_not_empty.wait()
+
     def global_task_worker(self):
         """
         Single worker thread that processes all tasks from the global queue
@@ -419,123 +627,181 @@ class AIControlSystem:
         """
         self.logger.info("Started global task worker thread")
         while True:
-            # Get task from the global queue
-            task_request = self.global_processing_queue.get()
+            # Get task from the global queue and decode it here, off the RabbitMQ IO loop
+            body = self._next_task()
+            try:
+                task_request = orjson.loads(body)
+                if not isinstance(task_request, dict):
+                    raise ValueError("task request is not a JSON object")
+            except ValueError as e:
+                self.logger.error("Invalid task request: %s", e)
+                continue
 
             try:
-                with global_task_lock:
-                    # Set processing flag to true
-                    with self.processing_lock:
-                        self.is_processing = True
-                        task_type = task_request.get("START", "UNKNOWN_TASK")
-                        self.logger.info(f"Processing task {task_type}")
+                # Set processing flag
+                self._busy.set()
+                task_type = task_request.get("START", "UNKNOWN_TASK")
+                self.logger.info("Processing task %s", task_type)
 
-                    # Process the task
-                    result = self.process_task_analysis(task_request)
+                # Process the task
+                result = self.process_task_analysis(task_request)
 
-                    # Send result to Node-RED
-                    self.send_result_to_node_red(result)
+                # Send result to Node-RED
+                self.send_result_to_node_red(result)
 
             except Exception as e:
                 task_type = task_request.get("START", "UNKNOWN_TASK")
-                self.logger.error(f"Error in global worker processing {task_type}: {e}")
+                self.logger.error("Error in global worker processing %s: %s", task_type, e)
                 # Update task status to ERROR if an exception occurs
                 self.update_task_status(task_type, "ERROR")
 
             finally:
-                # Set processing flag to false
-                with self.processing_lock:
-                    self.is_processing = False
-
-                # Mark the task as done
-                self.global_processing_queue.task_done()
-                self.logger.info(f"Completed task and ready for next")
+                # Clear processing flag
+                self._busy.clear()
+                self.logger.info("Completed task and ready for next")
 
     def start_worker_threads(self):
         """
-        Start the global task worker thread and the ping status thread
+        Start the global task worker thread and the periodic status pings
         """
+        # Start the analysis process now rather than at the first task; it takes seconds to import
+        # the vision libraries, and the single worker runs this before any task submitted later
+        self._analysis_pool.submit(TaskAnalyzer.warm_up)
+
         # Start global task worker thread
         task_thread = threading.Thread(target=self.global_task_worker, daemon=True)
         task_thread.start()
         self.logger.info("Started global task worker thread")
 
-        # Start ping status thread
-        ping_thread = threading.Thread(target=self.ping_status_worker, daemon=True)
-        ping_thread.start()
-        self.logger.info("Started ping status worker thread")
+        # Send the first round of pings now; each round re-arms the ping timer
+        self._emit_pings()
+        self.logger.info("Started ping status timer")
 
-    def consume_messages(self):
+    def _settle(self, channel, settle, **kwargs):
         """
-        Consume messages from RabbitMQ queues
+        Ack or nack a delivery from a deferred IO loop callback, unless the channel has closed since
+
+        :param channel: Channel the message was delivered on
+        :param settle: channel.basic_ack or channel.basic_nack
+        :param kwargs: Arguments for settle
+        """
+        if channel.is_open:
+            settle(**kwargs)
+        else:
+            # The broker redelivers unacknowledged messages once the consumer reconnects
+            self.logger.warning("Channel closed before delivery %s was settled", kwargs.get("delivery_tag"))
+
+    def _handle_web_message(self, channel, delivery_tag: int, body: bytes):
+        """
+        Parse and store a WEB_TO_AI message, then ack or nack it on the IO loop thread
+
+        :param channel: Channel the message was delivered on
+        :param delivery_tag: Delivery tag of the message
+        :param body: Undecoded JSON message body
         """
         try:
-            # Callback for WEB_TO_AI queue
-            # TODO: queue 필요 (5개 서버) web_to_ai
-            def web_to_ai_callback(ch, method, properties, body):
-                try:
-                    # Parse the incoming JSON message
-                    web_data = json.loads(body)
-                    self.logger.info(f"Received web data: {web_data['ORDER_NO']}")
-
-                    # Process and store the web data
-                    self.process_web_message(web_data)
-
-                    # Acknowledge message
-                    ch.basic_ack(delivery_tag=method.delivery_tag)
-
-                except Exception as e:
-                    self.logger.error(f"Error processing web message: {e}")
-                    ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
-
-            # Set up consumer for WEB_TO_AI queue
-            self.channel.basic_consume(queue="WEB_TO_AI", on_message_callback=web_to_ai_callback)
-
-            # Set up consumers for all Node-RED queues
-            for queue_config in self.node_red_config:
-                queue_name = queue_config["queue"]
-
-                # Define a callback for all NodeRED queues
-                def create_nodered_callback(queue):
-                    def callback(ch, method, properties, body):
-                        try:
-                            # Parse the incoming JSON message
-                            task_request = json.loads(body)
-                            task_type = task_request.get("START", "UNKNOWN_TASK")
-                            self.logger.info(f"Received task request in {queue}: {task_type}")
-
-                            # Check if we're already processing a task
-                            with self.processing_lock:
-                                if self.is_processing:
-                                    self.logger.info(f"Currently processing another task. Task {task_type} will be queued.")
-                                else:
-                                    self.logger.info(f"No tasks currently being processed. Task {task_type} will start soon.")
-
-                            # Add the task to the global processing queue
-                            self.global_processing_queue.put(task_request)
-                            self.logger.info(f"Task {task_type} added to global processing queue")
-
-                            # Acknowledge message
-                            ch.basic_ack(delivery_tag=method.delivery_tag)
-
-                        except Exception as e:
-                            self.logger.error(f"Error processing task request in {queue}: {e}")
-                            ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
-
-                    return callback
-
-                # Set up consumer for this queue
-                self.channel.basic_consume(queue=queue_name, on_message_callback=create_nodered_callback(queue_name))
-                self.logger.info(f"Set up consumer for {queue_name}")
-
-            self.logger.info("Waiting for messages. To exit press CTRL+C")
-            self.channel.start_consuming()
+            # Parse the incoming JSON message
+            web_data = orjson.loads(body)
+            self.logger.info("Received web data: %s", web_data["ORDER_NO"])
+
+            # Process and store the web data
+            self.process_web_message(web_data)
+
+            # Acknowledge message
+            self.connection.ioloop.add_callback_threadsafe(functools.partial(self._settle, channel, channel.basic_ack, delivery_tag=delivery_tag))
+
+        except OSError as e:
+            # Saving failed (e.g. order_data.json could not be written); requeue so the order update is not lost.
+            # The nack is delayed so a persistent failure does not make the broker redeliver in a tight loop;
+            # call_later is not thread-safe, so it is scheduled from the IO loop thread.
+            self.logger.error("Error saving web message, requeueing: %s", e)
+            self.connection.ioloop.add_callback_threadsafe(
+                functools.partial(
+                    self.connection.ioloop.call_later,
+                    REQUEUE_DELAY,
+                    functools.partial(self._settle, channel, channel.basic_nack, delivery_tag=delivery_tag, requeue=True),
+                )
+            )
 
+        except Exception as e:
+            self.logger.error("Error processing web message: %s", e)
+            self.connection.ioloop.add_callback_threadsafe(functools.partial(self._settle, channel, channel.basic_nack, delivery_tag=delivery_tag, requeue=False))
+
+    def _start_consumers(self):
+        """
+        Register consumers for the WEB_TO_AI queue and all Node-RED queues
+        """
+        # Callback for WEB_TO_AI queue
+        # TODO: queue 필요 (5개 서버) web_to_ai
+        def web_to_ai_callback(ch, method, properties, body):
+            # Parse and store on the web message thread; it acks back through the IO loop
+            self._web_pool.submit(self._handle_web_message, ch, method.delivery_tag, body)
+
+        # Set up consumer for WEB_TO_AI queue
+        self.channel.basic_consume(queue=WEB_TO_AI_CONFIG["queue"], on_message_callback=web_to_ai_callback)
+
+        # Set up consumers for all Node-RED queues
+        for queue_config in self.node_red_config:
+            queue_name = queue_config["queue"]
+
+            # Define a callback for all NodeRED queues
+            def create_nodered_callback(queue):
+                def callback(ch, method, properties, body):
+                    try:
+                        # The message is decoded by the global worker, not on the IO loop
+                        self.logger.info("Received task request in %s", queue)
+
+                        # Apply backpressure: hand the message back to the broker while the queue is full.
+                        # The nack is delayed so the broker does not redeliver it in a tight loop.
+                        if len(self.global_processing_queue) >= MAX_INFLIGHT:
+                            self.logger.warning("Global processing queue is full. Task from %s will be requeued.", queue)
+                            self.connection.ioloop.call_later(
+                                REQUEUE_DELAY,
+                                functools.partial(self._settle, ch, ch.basic_nack, delivery_tag=method.delivery_tag, requeue=True),
+                            )
+                            return
+
+                        # Check if we're already processing a task
+                        if self._busy.is_set():
+                            self.logger.info("Currently processing another task. Task from %s will be queued.", queue)
+                        else:
+                            self.logger.info("No tasks currently being processed. Task from %s will start soon.", queue)
+
+                        # Add the task to the global processing queue
+                        self._enqueue_task(body)
+                        self.logger.info("Task from %s added to global processing queue", queue)
+
+                        # Acknowledge message only once it is safely queued
+                        ch.basic_ack(delivery_tag=method.delivery_tag)
+
+                    except Exception as e:
+                        self.logger.error("Error processing task request in %s: %s", queue, e)
+                        ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+
+                return callback
+
+            # Set up consumer for this queue
+            self.channel.basic_consume(queue=queue_name, on_message_callback=create_nodered_callback(queue_name))
+            self.logger.info("Set up consumer for %s", queue_name)
+
+        self.logger.info("Waiting for messages. To exit press CTRL+C")
+
+    def consume_messages(self):
+        """
+        Consume messages from RabbitMQ queues by running the connection IO loop
+        """
+        try:
+            self.connection.ioloop.start()
         except KeyboardInterrupt:
-            self.channel.stop_consuming()
+            self._closing = True
             self.connection.close()
+            # Let the IO loop finish the close handshake; _on_connection_closed stops it again
+            self.connection.ioloop.start()
             self.logger.info("Message consuming stopped")
 
+        if self._connection_error is not None:
+            raise self._connection_error
+
     def run(self):
         """
         Main method to run the AI control system
@@ -545,7 +811,7 @@ class AIControlSystem:
             self.start_worker_threads()
             self.consume_messages()
         except Exception as e:
-            self.logger.error(f"AI Control System failed: {e}")
+            self.logger.error("AI Control System failed: %s", e)
             raise
 
 
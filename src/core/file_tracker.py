@@ -1,72 +1,157 @@
 # src/core/file_tracker.py
+import atexit
+import collections
 import os
 import json
 import threading
 from typing import Dict, List, Optional
+import orjson
 from src.utils.logger import setup_logger
+from src.utils.rwlock import RWLock
 
 # Configuration
 TRACKER_FILE = "last_processed_files.json"
+TRACKER_LOG_FILE = "last_processed_files.jsonl"  # Append-only log of files added since the last snapshot
 MAX_TRACKED_FILES = 4  # Number of last files to track per task type
+SNAPSHOT_EVERY = 16  # Number of logged additions that forces a snapshot
+SNAPSHOT_INTERVAL = 1.0  # Max seconds an addition stays only in the log before a snapshot
 
 class FileTracker:
     """
     Tracks the most recently processed files for each task type.
+
+    Each added file is appended as one JSON line to TRACKER_LOG_FILE; the full
+    state is only rewritten to TRACKER_FILE every SNAPSHOT_EVERY additions or
+    SNAPSHOT_INTERVAL seconds, after which the log is truncated.
     """
     def __init__(self):
         self.logger = setup_logger(__name__)
-        self.lock = threading.Lock()
+        self.rwlock = RWLock()
+        # Bounded deques: appendleft is O(1) and the oldest files fall off automatically
         self.data = {
-            'CASE': [],
-            'BOX': [],
-            'COVER': [],
-            'FORDING': [],
-            'FINAL': []
+            task_type: collections.deque(maxlen=MAX_TRACKED_FILES)
+            for task_type in ('CASE', 'BOX', 'COVER', 'FORDING', 'FINAL')
         }
+        # Latest file per task type; replaced (never mutated) on every write so readers need no lock
+        self._latest_snapshot = {task_type: None for task_type in self.data}
+        # Bumped on every change; cached API responses are reused while it is unchanged
+        self._version = 0
+        self._json_cache = {}  # Response key -> (version, JSON bytes)
+        self._pending = 0  # Additions logged since the last snapshot
+        self._snapshot_timer = None
+        self._log_fh = open(TRACKER_LOG_FILE, 'a', encoding='utf-8')
         self._load_data()
+        atexit.register(self.flush)
     
     def _load_data(self):
-        """Load tracked files data from the JSON file if it exists."""
+        """Load tracked files data from the JSON file if it exists, then replay the addition log."""
         try:
-            if os.path.exists(TRACKER_FILE):
-                with self.lock:
-                    with open(TRACKER_FILE, 'r') as f:
-                        loaded_data = json.load(f)
-                        # Ensure all required keys exist
-                        for key in self.data.keys():
-                            if key not in loaded_data:
-                                loaded_data[key] = []
-                        self.data = loaded_data
+            loaded_data = self._read_snapshot() if os.path.exists(TRACKER_FILE) else None
+            snapshot_exists = loaded_data is not None
+            with self.rwlock.write_lock():
+                if snapshot_exists:
+                    # Ensure all required keys exist
+                    for key in self.data.keys():
+                        if key not in loaded_data:
+                            loaded_data[key] = []
+                    self.data = {
+                        key: collections.deque(files, maxlen=MAX_TRACKED_FILES)
+                        for key, files in loaded_data.items()
+                    }
+                replayed = self._replay_log()
+                self._publish_latest()
+            if snapshot_exists:
                 self.logger.info("Loaded tracked files data from file")
-            else:
-                self._save_data()  # Create the file if it doesn't exist
+            if replayed or not snapshot_exists:
+                self._save_data()  # Create the file, or fold replayed additions into a new snapshot
+            if not snapshot_exists:
                 self.logger.info("Created new tracked files data file")
         except Exception as e:
             self.logger.error(f"Error loading tracked files data: {e}")
     
+    def _read_snapshot(self) -> Optional[Dict]:
+        """
+        Read the snapshot written by _save_data.
+        
+        :return: Snapshot data, or None if it is corrupt (it is then moved aside, not overwritten)
+        """
+        # orjson writes raw UTF-8, so read bytes rather than text in the locale encoding
+        with open(TRACKER_FILE, 'rb') as f:
+            snapshot_bytes = f.read()
+        try:
+            return orjson.loads(snapshot_bytes)
+        except ValueError as e:
+            corrupt_file = TRACKER_FILE + '.corrupt'
+            os.replace(TRACKER_FILE, corrupt_file)
+            self.logger.error(f"Corrupt tracked files data moved to {corrupt_file}: {e}")
+            return None
+    
+    def _replay_log(self) -> int:
+        """
+        Apply additions logged after the last snapshot. Must be called with the write lock held.
+        
+        :return: Number of replayed additions
+        """
+        replayed = 0
+        with open(TRACKER_LOG_FILE, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    file_info = json.loads(line)
+                except ValueError:
+                    continue  # Torn last line from an interrupted write
+                files = self.data.get(file_info.get('task_type'))
+                # Skip unknown task types and additions the snapshot already contains
+                if files is None or any(f['path'] == file_info['path'] for f in files):
+                    continue
+                files.appendleft(file_info)
+                replayed += 1
+        return replayed
+    
     def _save_data(self):
-        """Save tracked files data to the JSON file."""
+        """Save tracked files data to the JSON file and truncate the addition log."""
         try:
-            with self.lock:
-                with open(TRACKER_FILE, 'w') as f:
-                    json.dump(self.data, f, indent=4)
+            with self.rwlock.write_lock():
+                if self._snapshot_timer is not None:
+                    self._snapshot_timer.cancel()
+                    self._snapshot_timer = None
+                # Write a temp file and rename it over the snapshot so a crash never leaves it half written
+                tmp_file = TRACKER_FILE + '.tmp'
+                with open(tmp_file, 'wb') as f:
+                    f.write(orjson.dumps({key: list(files) for key, files in self.data.items()}))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_file, TRACKER_FILE)
+                # The snapshot now covers every logged addition
+                self._log_fh.seek(0)
+                self._log_fh.truncate()
+                self._pending = 0
             self.logger.debug("Saved tracked files data to file")
         except Exception as e:
             self.logger.error(f"Error saving tracked files data: {e}")
     
-    def add_file(self, task_type: str, file_path: str, metadata: Optional[Dict] = None):
+    def _publish_latest(self):
+        """Rebuild the latest-files snapshot. Must be called with the write lock held."""
+        self._latest_snapshot = {task_type: files[0] if files else None for task_type, files in self.data.items()}
+    
+    def flush(self):
+        """Write a snapshot if any additions are only in the log."""
+        if self._pending:
+            self._save_data()
+    
+    def add_file(self, task_type: str, file_path: str, metadata: Optional[Dict] = None, verify: bool = False):
         """
         Add a new file to the tracker for a specific task type.
         
         :param task_type: Type of task (CASE, BOX, etc.)
         :param file_path: Path to the saved file
-        :param metadata: Optional metadata about the file (status, timestamp, etc.)
+        :param metadata: Optional metadata about the file (status, timestamp, filename, etc.)
+        :param verify: Check that the file exists first; callers passing a path they just wrote can skip the stat
         """
         if task_type not in self.data:
             self.logger.warning(f"Unknown task type: {task_type}")
             return
         
-        if not os.path.exists(file_path):
+        if verify and not os.path.exists(file_path):
             self.logger.warning(f"File does not exist: {file_path}")
             return
         
@@ -76,20 +161,34 @@ class FileTracker:
         
         file_info = {
             'path': file_path,
-            'filename': os.path.basename(file_path),
+            'filename': metadata.get('filename') or os.path.basename(file_path),
             'timestamp': metadata.get('timestamp', ''),
             'status': metadata.get('status', 'UNKNOWN'),
             'task_type': task_type,
             'details': metadata.get('details', '')
         }
         
-        with self.lock:
-            # Add the new file at the beginning of the list
-            self.data[task_type].insert(0, file_info)
-            # Keep only the most recent files
-            self.data[task_type] = self.data[task_type][:MAX_TRACKED_FILES]
+        with self.rwlock.write_lock():
+            # Add the new file at the beginning; the deque drops the oldest beyond MAX_TRACKED_FILES
+            self.data[task_type].appendleft(file_info)
+            # Only this task type changed, so update the latest-files snapshot incrementally
+            latest = dict(self._latest_snapshot)
+            latest[task_type] = file_info
+            self._latest_snapshot = latest
+            self._version += 1
             
-        self._save_data()
+            # Append the addition to the log instead of rewriting the whole file
+            self._log_fh.write(json.dumps(file_info, separators=(',', ':')) + '\n')
+            self._log_fh.flush()
+            self._pending += 1
+            snapshot_due = self._pending >= SNAPSHOT_EVERY
+            if not snapshot_due and self._snapshot_timer is None:
+                self._snapshot_timer = threading.Timer(SNAPSHOT_INTERVAL, self._save_data)
+                self._snapshot_timer.daemon = True
+                self._snapshot_timer.start()
+            
+        if snapshot_due:
+            self._save_data()
         self.logger.info(f"Added file {file_path} to tracked files for {task_type}")
     
     def get_files(self, task_type: Optional[str] = None) -> Dict[str, List]:
@@ -99,12 +198,12 @@ class FileTracker:
         :param task_type: Optional task type to filter results
         :return: Dictionary with task types and their recent files
         """
-        with self.lock:
+        with self.rwlock.read_lock():
             if task_type:
                 if task_type in self.data:
-                    return {task_type: self.data[task_type]}
+                    return {task_type: list(self.data[task_type])}
                 return {task_type: []}
-            return self.data
+            return {key: list(files) for key, files in self.data.items()}
     
     def get_latest_files(self) -> Dict[str, Dict]:
         """
@@ -112,14 +211,43 @@ class FileTracker:
         
         :return: Dictionary with task types and their most recent file
         """
-        result = {}
-        with self.lock:
-            for task_type, files in self.data.items():
-                if files:
-                    result[task_type] = files[0]
-                else:
-                    result[task_type] = None
-        return result
+        # Published atomically by writers, so it can be returned without locking
+        return self._latest_snapshot
+    
+    def get_files_json(self, task_type: Optional[str] = None) -> bytes:
+        """
+        Get the JSON-encoded response of get_files, cached until the next change.
+        
+        :param task_type: Optional task type to filter results
+        :return: UTF-8 JSON bytes
+        """
+        if task_type and task_type not in self.data:
+            # Unknown task types are not cached so arbitrary URLs cannot grow the cache
+            return self._dumps({task_type: []})
+        return self._cached_json(task_type or '*all*', lambda: self.get_files(task_type))
+    
+    def get_latest_files_json(self) -> bytes:
+        """
+        Get the JSON-encoded response of get_latest_files, cached until the next change.
+        
+        :return: UTF-8 JSON bytes
+        """
+        return self._cached_json('*latest*', self.get_latest_files)
+    
+    def _cached_json(self, key: str, build) -> bytes:
+        """Return the cached JSON for key, re-encoding build() if the data changed since it was cached."""
+        # Read the version before building so a concurrent write can only make the entry look stale
+        version = self._version
+        cached = self._json_cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        body = self._dumps(build())
+        self._json_cache[key] = (version, body)
+        return body
+    
+    @staticmethod
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj)
 
 # Create a singleton instance
 file_tracker = FileTracker()
\ No newline at end of file
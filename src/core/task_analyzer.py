@@ -1,5 +1,7 @@
-import json
+import atexit
 import os
+import queue
+import threading
 import time
 from typing import Any, Dict, Optional
 from uuid import uuid4
@@ -7,7 +9,7 @@ from uuid import uuid4
 import cv2
 import easyocr
 import numpy as np
-from pyzbar.pyzbar import decode
+from pyzbar.pyzbar import ZBarSymbol, decode
 from ultralytics import YOLO
 
 from src.utils.camera import GalaxyCamera
@@ -25,6 +27,112 @@ if not os.path.exists(SAVE_DIR):
 
 logger = setup_logger(__name__)
 
+# Quality 85 without Huffman optimization or progressive scans: faster to encode, far fewer bytes to mirror
+JPEG_PARAMS = [cv2.IMWRITE_JPEG_QUALITY, 85, cv2.IMWRITE_JPEG_OPTIMIZE, 0, cv2.IMWRITE_JPEG_PROGRESSIVE, 0]
+
+# Archival copies for SAVE_DIRS, written by a background thread off the inspection path
+_mirror_queue = queue.Queue(maxsize=256)
+
+
+def _write_bytes(file_path: str, data) -> bool:
+    """Write an encoded frame to file_path, logging instead of raising if the target is unavailable."""
+    try:
+        with open(file_path, "wb") as file:
+            file.write(data)
+        return True
+    except OSError as e:
+        logger.warning(f"Failed to write {file_path}: {str(e)}")
+        return False
+
+
+def _mirror_worker():
+    """Write queued frames to every mirror directory."""
+    while True:
+        filename, data = _mirror_queue.get()
+        for save_d in SAVE_DIRS:
+            _write_bytes(os.path.join(save_d, filename), data)
+
+
+threading.Thread(target=_mirror_worker, name="frame-mirror", daemon=True).start()
+
+# Korean easyocr reader, created on first use since loading its models takes seconds
+_ocr_reader = None
+
+
+def _get_ocr_reader() -> easyocr.Reader:
+    global _ocr_reader
+    if _ocr_reader is None:
+        _ocr_reader = easyocr.Reader(["ko"])
+    return _ocr_reader
+
+
+# Opened cameras by device index, kept open across tasks since the Galaxy open handshake is slow
+_camera_cache: Dict[int, GalaxyCamera] = {}
+_camera_lock = threading.Lock()
+
+
+def _get_camera(device_index: int) -> GalaxyCamera:
+    with _camera_lock:
+        camera = _camera_cache.get(device_index)
+        if camera is not None and camera.isOpened():
+            try:
+                # Drop frames buffered while the camera sat idle between tasks
+                camera.flush()
+                return camera
+            except Exception as e:
+                logger.warning(f"Reopening camera {device_index}: {str(e)}")
+                camera.release()
+
+        camera = GalaxyCamera(device_index)
+        _camera_cache[device_index] = camera
+        return camera
+
+
+@atexit.register
+def _release_cameras():
+    with _camera_lock:
+        for camera in _camera_cache.values():
+            camera.release()
+        _camera_cache.clear()
+
+
+# Only QR codes are read, so pyzbar skips its 1D barcode scanners
+QR_SYMBOLS = [ZBarSymbol.QRCODE]
+
+# case_task runs the full-frame QR decode on every Nth camera frame only
+QR_DECODE_EVERY = 3
+
+# HSV bounds for cover color analysis
+_YELLOW_LO = np.array([10, 100, 100], dtype=np.uint8)  # Adjusted lower bound for deeper yellows (amber tones)
+_YELLOW_HI = np.array([40, 255, 255], dtype=np.uint8)
+_RED1_LO = np.array([0, 150, 50], dtype=np.uint8)  # Low hue red range
+_RED1_HI = np.array([10, 255, 150], dtype=np.uint8)
+_RED2_LO = np.array([170, 150, 50], dtype=np.uint8)  # High hue red range
+_RED2_HI = np.array([180, 255, 150], dtype=np.uint8)
+
+# HSV image and mask buffers for cover color analysis, reused across frames of the same shape
+_color_buffers: Dict[tuple, tuple] = {}
+
+
+def _get_color_buffers(shape: tuple) -> tuple:
+    buffers = _color_buffers.get(shape)
+    if buffers is None:
+        height, width = shape[:2]
+        buffers = (
+            np.empty((height, width, 3), dtype=np.uint8),
+            np.empty((height, width), dtype=np.uint8),
+            np.empty((height, width), dtype=np.uint8),
+            np.empty((height, width), dtype=np.uint8),
+        )
+        _color_buffers[shape] = buffers
+    return buffers
+
+
+# VideoWriter codecs, from the browser-compatible default to the most widely available fallback
+_FOURCC_H264 = cv2.VideoWriter_fourcc(*"H264")
+_FOURCC_DIVX = cv2.VideoWriter_fourcc(*"DIVX")
+_FOURCC_MJPG = cv2.VideoWriter_fourcc(*"MJPG")
+
 
 def save_video(frames, task_name: str, camera_id: int, fps: float = 30.0, extension="mp4") -> str:
     # Generate a unique file name using UUID
@@ -32,7 +140,7 @@ def save_video(frames, task_name: str, camera_id: int, fps: float = 30.0, extens
     timestamp = time.strftime("%Y%m%d_%H%M%S")
 
     # Default to MP4 with H264 codec which is browser-compatible
-    fourcc = cv2.VideoWriter_fourcc(*"H264")
+    fourcc = _FOURCC_H264
     filename = f"{task_name}_{camera_id}_{timestamp}_{unique_id}.{extension}"
     file_path = os.path.join(SAVE_DIR, filename)
 
@@ -46,7 +154,7 @@ def save_video(frames, task_name: str, camera_id: int, fps: float = 30.0, extens
     if not out.isOpened():
         # Try DIVX with AVI container (these are compatible)
         extension = "avi"
-        fourcc = cv2.VideoWriter_fourcc(*"DIVX")
+        fourcc = _FOURCC_DIVX
         filename = f"{task_name}_{camera_id}_{timestamp}_{unique_id}.{extension}"
         file_path = os.path.join(SAVE_DIR, filename)
         out = cv2.VideoWriter(file_path, fourcc, fps, (width, height))
@@ -54,7 +162,7 @@ def save_video(frames, task_name: str, camera_id: int, fps: float = 30.0, extens
 
         # If DIVX fails too, try MJPG with AVI
         if not out.isOpened():
-            fourcc = cv2.VideoWriter_fourcc(*"MJPG")
+            fourcc = _FOURCC_MJPG
             filename = f"{task_name}_{camera_id}_{timestamp}_{unique_id}.{extension}"
             file_path = os.path.join(SAVE_DIR, filename)
             out = cv2.VideoWriter(file_path, fourcc, fps, (width, height))
@@ -80,12 +188,24 @@ def save_frame(frame, task_name: str, camera_id: int, extension="jpg") -> str:
     filename = f"{task_name}_{camera_id}_{timestamp}_{unique_id}.{extension}"
 
     file_path = os.path.join(SAVE_DIR, filename)
-    cv2.imwrite(file_path, frame)
-    
-    for save_d in SAVE_DIRS:
-        d_file_path = os.path.join(save_d, filename)
-        # Save the frame
-        cv2.imwrite(d_file_path, frame)
+
+    # Encode once; the local copy is written now, the mirror copies in the background
+    params = JPEG_PARAMS if extension.lower() in ("jpg", "jpeg") else []
+    ok, encoded = cv2.imencode(f".{extension}", frame, params)
+    if not ok:
+        logger.error(f"Failed to encode {task_name} frame as {extension}")
+        return ""  # Nothing was saved, so there is no file to track or upload
+
+    saved = _write_bytes(file_path, encoded)
+
+    try:
+        _mirror_queue.put_nowait((filename, encoded))
+    except queue.Full:
+        # Mirrors are archival only, so drop rather than block the inspection
+        logger.warning(f"Mirror queue full, skipping archival copies of {filename}")
+
+    if not saved:
+        return ""  # The mirrors may still get a copy, but the local file the caller tracks is missing
 
     # Log the saved image
     logger.info(f"Saved {task_name} frame to {file_path}")
@@ -100,31 +220,40 @@ class TaskAnalyzer:
 
     __folding_value = None
 
+    # Folding YOLO model, loaded and fused on first use
+    _yolo_model: Optional[YOLO] = None
+
+    @staticmethod
+    def unknown_task_analysis(task_data: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+        """
+        Fallback analyzer for task names missing from the task analysis map
+        (defined here so the analysis process can unpickle it without importing the control system)
+        """
+        return {"status": "ERROR", "details": "Unknown task"}
+
     @staticmethod
-    def _init_camera(camera_id: int = 1) -> Optional[cv2.VideoCapture]:
+    def warm_up() -> None:
+        """
+        No-op submitted to a new analysis process: unpickling it imports this module, and with it
+        OpenCV, easyocr and ultralytics, before the first task arrives
         """
-        Initialize the camera and load the corresponding order data from a JSON file.
 
-        :param camera_id: Camera device ID (default is 1 for primary camera)
-        :param order_no: Order number to load the corresponding JSON data
-        :return: VideoCapture object or None if camera initialization fails and current order data
+    @staticmethod
+    def _init_camera(camera_id: int = 1, task_data: Optional[Dict[str, Any]] = None) -> tuple[Optional[GalaxyCamera], Optional[Dict[str, Any]]]:
+        """
+        Get the shared camera and the current order data.
+
+        :param camera_id: Camera ID of the task (currently all tasks share Galaxy device 1)
+        :param task_data: Task data carrying the order data the control system passed in
+        :return: Tuple of (camera or None if it is not opened, current order data or None if none was passed)
         """
-        # TODO: Initialize camera
         # 카메라 접속 IP
-        camera = GalaxyCamera(1)
+        camera = _get_camera(1)
         # camera = cv2.VideoCapture(f"http://localhost:888{camera_id}/video")
         if not camera.isOpened():
             return None, None
 
-        order_file_path = f"order_data.json"
-        if os.path.exists(order_file_path):
-            with open(order_file_path, "r") as json_file:
-                current_order_data = json.load(json_file)
-                return camera, current_order_data
-        else:
-            return camera, None  # No file found for the given order_no
-
-        return camera, None
+        return camera, task_data.get("order_data") if task_data else None
 
     @staticmethod
     def _read_qr_code(frame: np.ndarray) -> Optional[str]:
@@ -137,8 +266,8 @@ class TaskAnalyzer:
         # Convert frame to grayscale for better QR code detection
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
 
-        # Decode QR codes in the frame
-        qr_codes = decode(gray)
+        # Decode QR codes in the full-resolution frame
+        qr_codes = decode(gray, symbols=QR_SYMBOLS)
 
         if qr_codes:
             # Return the text from the first detected QR code
@@ -154,16 +283,12 @@ class TaskAnalyzer:
         :return: Detected text or None if no text found
         """
         try:
-
-            reader = easyocr.Reader(["ko"])  # 'en' stands for English
+            reader = _get_ocr_reader()
             # Use easyocr to extract text from the image
             result = reader.readtext(frame)
 
-            # Print the result
-            for detection in result:
-                text = detection[1]  # The detected text
-                # print(text)
-
+            # Use the text of the last detection
+            text = result[-1][1] if result else None
             return text if text else None
 
         except Exception as e:
@@ -171,40 +296,30 @@ class TaskAnalyzer:
             return None
 
     @staticmethod
-    def _analyze_color_coverage(frame: np.ndarray, color: str) -> tuple[float, np.ndarray]:
+    def _analyze_color_coverage_both(frame: np.ndarray) -> tuple[float, float]:
         """
-        Analyze the coverage of a specific color in the frame
+        Analyze yellow and red coverage of the frame in a single HSV pass
 
         :param frame: Input frame
-        :param color: Color to analyze ('yellow' or 'red')
-        :return: Tuple of (coverage percentage, mask)
+        :return: Tuple of (yellow coverage, red coverage)
         """
-        # Convert to HSV color space
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-
-        if color == "yellow":
-            # Adjusted range for deeper yellows (amber tones)
-            lower = np.array([10, 100, 100])  # Adjusted lower bound for deeper yellows
-            upper = np.array([40, 255, 255])  # Upper bound for yellow
+        # Every 4th pixel on each axis gives the same coverage ratio at 1/16 of the work
+        small = frame[::4, ::4]
+        hsv, yellow_mask, red_mask, red_mask2 = _get_color_buffers(small.shape)
 
-            # Create mask for yellow
-            mask = cv2.inRange(hsv, lower, upper)
-        else:  # red
-            # Adjusted ranges for red
-            lower1 = np.array([0, 150, 50])  # Low saturation, dark red
-            upper1 = np.array([10, 255, 150])  # Light red to dark red
-            lower2 = np.array([170, 150, 50])  # Dark red hue
-            upper2 = np.array([180, 255, 150])  # Dark red hue range
+        # Convert to HSV color space once for both colors
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV, dst=hsv)
 
-            # Create masks for both red ranges and combine
-            mask1 = cv2.inRange(hsv, lower1, upper1)
-            mask2 = cv2.inRange(hsv, lower2, upper2)
-            mask = cv2.bitwise_or(mask1, mask2)
+        yellow_mask = cv2.inRange(hsv, _YELLOW_LO, _YELLOW_HI, dst=yellow_mask)
 
-        # Calculate the coverage percentage
-        coverage = np.sum(mask > 0) / (mask.shape[0] * mask.shape[1])
+        # Red wraps around hue 0, so combine the low and high hue ranges
+        red_mask = cv2.inRange(hsv, _RED1_LO, _RED1_HI, dst=red_mask)
+        red_mask2 = cv2.inRange(hsv, _RED2_LO, _RED2_HI, dst=red_mask2)
+        red_mask = cv2.bitwise_or(red_mask, red_mask2, dst=red_mask)
 
-        return coverage, mask
+        # Calculate the coverage percentages
+        pixels = yellow_mask.shape[0] * yellow_mask.shape[1]
+        return cv2.countNonZero(yellow_mask) / pixels, cv2.countNonZero(red_mask) / pixels
 
     @staticmethod
     def _detect_dominant_color(frame: np.ndarray) -> str:
@@ -216,7 +331,8 @@ class TaskAnalyzer:
         """
         # Calculate the average color for each channel (Red, Green, Blue)
         # OpenCV stores images in BGR format, so we adjust accordingly
-        blue_avg, green_avg, red_avg = np.mean(frame, axis=(0, 1))  # BGR order in OpenCV
+        # A 4x subsampled view is enough for channel averages
+        blue_avg, green_avg, red_avg, _ = cv2.mean(frame[::4, ::4])  # BGR order in OpenCV
 
         # Check which color channel is dominant and return the corresponding color
         if green_avg > red_avg and green_avg > blue_avg:
@@ -234,43 +350,41 @@ class TaskAnalyzer:
         timeout = task_data.get("timeout", 10) if task_data else 10
         result = {"task_name": "case_task", "status": "NG", "confidence": "0%", "details": "Q002"}  # Default error code
 
-        camera, current_order_data = TaskAnalyzer._init_camera(camera_id)
+        camera, current_order_data = TaskAnalyzer._init_camera(camera_id, task_data)
         if not camera:
             result["details"] = "Q002"
             return result
 
-        frames = []
         try:
             start_time = time.time()
+            frame_index = -1
             while (time.time() - start_time) < timeout:
                 ret, frame = camera.read()
                 if not ret:
                     continue
 
-                frames.append(frame)
+                # The blocking read() paces the loop; skip the decode on the frames in between
+                frame_index += 1
+                if frame_index % QR_DECODE_EVERY != 0:
+                    continue
+
                 qr_text = TaskAnalyzer._read_qr_code(frame)
 
                 if qr_text == current_order_data["BOM"][2]["ITEM_NM"]:
                     result["status"] = "OK"
                     result["confidence"] = "95%"
                     result["details"] = "OK"  # Changed to OK for success
-                    # saved_video_path = save_video(frames, "case_task", camera_id)
                     saved_video_path = save_frame(frame, "case_task", camera_id)
                     result["saved_file_path"] = saved_video_path
                     break
 
-                time.sleep(0.1)
-
             if result["status"] == "NG":
-                # saved_video_path = save_video(frames, "case_task", camera_id)
                 saved_video_path = save_frame(frame, "case_task", camera_id)
                 result["saved_file_path"] = saved_video_path
 
         except Exception as e:
             result["details"] = "Q002"
             logger.error(f"Case task error: {str(e)}")
-        finally:
-            camera.release()
 
         return result
 
@@ -279,7 +393,7 @@ class TaskAnalyzer:
         camera_id = task_data.get("camera_id", 2) if task_data else 2
         result = {"task_name": "box_task", "status": "NG", "confidence": "0%", "details": "Q014"}  # Default error
 
-        camera, current_order_data = TaskAnalyzer._init_camera(camera_id)
+        camera, current_order_data = TaskAnalyzer._init_camera(camera_id, task_data)
         if not camera:
             return result
 
@@ -347,8 +461,6 @@ class TaskAnalyzer:
 
         except Exception as e:
             logger.error(f"Box task error: {str(e)}")
-        finally:
-            camera.release()
 
         return result
 
@@ -357,7 +469,7 @@ class TaskAnalyzer:
         camera_id = task_data.get("camera_id", 3) if task_data else 3
         result = {"task_name": "cover_task", "status": "NG", "confidence": "0%", "details": "Q022", "saved_file_path": ""}  # Initialize with empty string
 
-        camera, current_order_data = TaskAnalyzer._init_camera(camera_id)
+        camera, current_order_data = TaskAnalyzer._init_camera(camera_id, task_data)
         if not camera:
             result["details"] = f"Failed to initialize camera {camera_id}"
             return result
@@ -374,8 +486,7 @@ class TaskAnalyzer:
             result["saved_file_path"] = saved_frame_path
 
             # Analyze color coverage
-            yellow_coverage, _ = TaskAnalyzer._analyze_color_coverage(frame, "yellow")
-            red_coverage, _ = TaskAnalyzer._analyze_color_coverage(frame, "red")
+            yellow_coverage, red_coverage = TaskAnalyzer._analyze_color_coverage_both(frame)
             total_coverage = yellow_coverage + red_coverage
 
             if total_coverage >= task_data.get("color_threshold", 0.15):
@@ -394,10 +505,7 @@ class TaskAnalyzer:
             result["details"] = f"Error during cover color analysis: {str(e)}"
             logger.error(f"Cover analysis error: {str(e)}")
 
-        finally:
-            camera.release()
-
-        print(result["details"], current_order_data["BOM"][2]["ITEM_NM"])
+        logger.debug("Cover details: %s, order item: %s", result["details"], current_order_data["BOM"][2]["ITEM_NM"])
 
         final_result = {}  # Create a new dictionary for the final result
 
@@ -447,12 +555,15 @@ class TaskAnalyzer:
             "details": "Q034",
         }  # Default error
 
-        camera, current_order_data = TaskAnalyzer._init_camera(camera_id)
+        camera, current_order_data = TaskAnalyzer._init_camera(camera_id, task_data)
         if not camera:
             return result
 
         try:
-            model = YOLO(model_path)
+            if TaskAnalyzer._yolo_model is None:
+                TaskAnalyzer._yolo_model = YOLO(model_path)
+                TaskAnalyzer._yolo_model.fuse()
+            model = TaskAnalyzer._yolo_model
             if not model:
                 return result
 
@@ -463,7 +574,8 @@ class TaskAnalyzer:
             saved_frame_path = save_frame(frame, "folding_task", camera_id)
             result["saved_file_path"] = saved_frame_path
 
-            results = model(frame)
+            # half=True runs FP16 on GPU; ultralytics ignores it on CPU
+            results = model.predict(frame, verbose=False, imgsz=640, half=True)
             # Extract the first detected object and its class name
             if len(results) > 0:
                 # Get the first result (first image)
@@ -506,8 +618,6 @@ class TaskAnalyzer:
 
         except Exception as e:
             logger.error(f"Folding task error: {str(e)}")
-        finally:
-            camera.release()
 
         return result  # TODO: result variable saving
 
@@ -526,7 +636,7 @@ class TaskAnalyzer:
         result = {"task_name": "final_check_task", "status": "NG", "confidence": "0%", "details": "Final check analysis not started"}
 
         # Initialize camera
-        camera, current_order_data = TaskAnalyzer._init_camera(camera_id)
+        camera, current_order_data = TaskAnalyzer._init_camera(camera_id, task_data)
         if not camera:
             result["details"] = f"Failed to initialize camera {camera_id}"
             return result
@@ -563,8 +673,4 @@ class TaskAnalyzer:
             result["details"] = f"Error during final check: {str(e)}"
             logger.error(f"Final check error: {str(e)}")
 
-        finally:
-            # Always release the camera
-            camera.release()
-
         return result
@@ -134,6 +134,11 @@ class GalaxyCamera:
             print(f"Error reading frame: {str(e)}")
             return False, None
 
+    def flush(self):
+        """Discard frames queued in the stream buffer so the next read returns a fresh frame."""
+        if self.is_opened:
+            self.camera.data_stream[0].flush_queue()
+
     def isOpened(self):
         """Check if camera is opened."""
         return self.is_opened
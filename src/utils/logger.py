@@ -1,6 +1,49 @@
+import atexit
 import logging
+import logging.handlers
+import queue
+import threading
 from src.config.settings import LOG_LEVEL
 
+# Queues feeding the background listener of each log file
+_log_queues = {}
+_log_queues_lock = threading.Lock()
+
+def _get_log_queue(log_file):
+    """
+    Get the queue for a log file, starting its listener on first use.
+
+    The listener thread owns the console and file handlers, so writing to the
+    console and the file happens off the thread that emitted the record. The
+    message and any traceback are still rendered on the emitting thread, by
+    QueueHandler.prepare().
+
+    :param log_file: Path to the log file.
+    """
+    with _log_queues_lock:
+        if log_file not in _log_queues:
+            # Console handler
+            console_handler = logging.StreamHandler()
+            console_formatter = logging.Formatter(
+                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+            )
+            console_handler.setFormatter(console_formatter)
+
+            # File handler
+            file_handler = logging.FileHandler(log_file)
+            file_formatter = logging.Formatter(
+                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+            )
+            file_handler.setFormatter(file_formatter)
+
+            log_queue = queue.Queue(-1)
+            listener = logging.handlers.QueueListener(log_queue, console_handler, file_handler)
+            listener.start()
+            # Flush pending records on interpreter shutdown
+            atexit.register(listener.stop)
+            _log_queues[log_file] = log_queue
+        return _log_queues[log_file]
+
 def setup_logger(name, log_file='app.log'):
     """
     Set up logger with consistent configuration to log to both console and file.
@@ -12,21 +55,8 @@ def setup_logger(name, log_file='app.log'):
     
     # Avoid adding handlers multiple times if the logger already exists
     if not logger.handlers:
-        # Console handler
-        console_handler = logging.StreamHandler()
-        console_formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        console_handler.setFormatter(console_formatter)
-        logger.addHandler(console_handler)
-
-        # File handler
-        file_handler = logging.FileHandler(log_file)
-        file_formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
+        # Queue handler; the listener writes to console and file in the background
+        logger.addHandler(logging.handlers.QueueHandler(_get_log_queue(log_file)))
 
     logger.setLevel(LOG_LEVEL)
     return logger
@@ -0,0 +1,36 @@
+import threading
+from contextlib import contextmanager
+
+class RWLock:
+    """
+    Reader-preferring shared/exclusive lock.
+
+    Any number of readers may hold the lock at the same time; a writer waits
+    until no readers remain and then excludes readers and other writers.
+    The lock is not reentrant.
+    """
+    def __init__(self):
+        self._readers = 0
+        self._readers_lock = threading.Lock()  # Guards the reader count
+        self._writer_lock = threading.Lock()  # Held by a writer, or by the readers as a group
+
+    @contextmanager
+    def read_lock(self):
+        """Hold the lock shared for the duration of the block."""
+        with self._readers_lock:
+            self._readers += 1
+            if self._readers == 1:
+                self._writer_lock.acquire()
+        try:
+            yield
+        finally:
+            with self._readers_lock:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._writer_lock.release()
+
+    @contextmanager
+    def write_lock(self):
+        """Hold the lock exclusively for the duration of the block."""
+        with self._writer_lock:
+            yield
@@ -1,4 +1,4 @@
-from flask import Flask, render_template, jsonify, send_from_directory
+from flask import Flask, Response, render_template, send_from_directory
 import os
 from src.core.file_tracker import file_tracker
 
@@ -11,7 +11,12 @@ app = Flask(__name__,
 # This is a cleaner approach than creating a custom route handler
 app.config['MEDIA_FOLDER'] = os.path.abspath('')
 
-print(file_tracker.get_latest_files())
+# Let a fronting nginx/apache send media files itself when it is configured for X-Sendfile
+app.config['USE_X_SENDFILE'] = os.getenv('USE_X_SENDFILE', '0') == '1'
+
+# Seconds clients may reuse a media file before revalidating it. Saved frames have unique names, but
+# /media serves any file under MEDIA_FOLDER, so responses are not marked immutable
+MEDIA_MAX_AGE = 3600
 
 @app.route('/')
 def index():
@@ -38,26 +43,32 @@ def inde_fFinal():
     """Render the main visualization page."""
     return render_template('index_fFinal.html')
 
+def _json_response(body: bytes) -> Response:
+    """Wrap pre-encoded JSON bytes in a response."""
+    return Response(body, mimetype='application/json')
+
 @app.route('/api/last_files')
 def get_last_files():
     """Get the most recent files for all task types."""
-    return jsonify(file_tracker.get_latest_files())
+    return _json_response(file_tracker.get_latest_files_json())
 
 @app.route('/api/all_files')
 def get_all_files():
     """Get all tracked files for all task types."""
-    return jsonify(file_tracker.get_files())
+    return _json_response(file_tracker.get_files_json())
 
 @app.route('/api/files/<task_type>')
 def get_task_files(task_type):
     """Get tracked files for a specific task type."""
-    return jsonify(file_tracker.get_files(task_type))
+    return _json_response(file_tracker.get_files_json(task_type))
 
 # Simplified media serving using send_from_directory
 @app.route('/media/<path:file_path>')
 def serve_media(file_path):
     """Serve media files (images and videos) from the media folder."""
-    return send_from_directory(app.config['MEDIA_FOLDER'], file_path)
+    response = send_from_directory(app.config['MEDIA_FOLDER'], file_path, conditional=True, max_age=MEDIA_MAX_AGE)
+    response.headers['Cache-Control'] = f'public,max-age={MEDIA_MAX_AGE}'
+    return response
 
 # # Uncomment to run the app
 # if __name__ == '__main__':
@@ -4,65 +4,568 @@
 # Then install OpenCV with GUI support
 # pip install opencv-python
 
+import argparse
+from collections import deque
 import cv2
+import functools
 import numpy as np
-import sys
+import os
+import queue
+import signal
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
 
-def stream_video_from_url(url):
-    # Create a VideoCapture object
-    cap = cv2.VideoCapture(url)
+from src.utils.logger import setup_logger
+
+# Queue-backed logger: the message is rendered on the calling thread, but the console and file
+# writes happen on a listener thread, off the frame path
+logger = setup_logger(__name__)
+
+# Give up on an unreachable network stream after this long instead of the backend default
+OPEN_TIMEOUT_MSEC = 5000
+# Frames arriving faster than this are grabbed but never decoded
+TARGET_DISPLAY_FPS = 30
+# Decode buffers reused by the reader: one being written, one queued, one on screen
+FRAME_RING_SIZE = 3
+# Seconds between FPS/latency reports, and how many recent frames they average over
+STATS_INTERVAL = 2.0
+STATS_WINDOW = 120
+# A frame shown more than this many display intervals after it was grabbed counts as late
+LATE_FRAME_INTERVALS = 2
+# Reconnect delays for dropped live streams, doubling from the first up to the cap
+RECONNECT_MIN_DELAY = 0.1
+RECONNECT_MAX_DELAY = 5.0
+# FFmpeg demuxer flags that stop it buffering and probing ahead of the live edge
+FFMPEG_LOW_LATENCY_OPTIONS = "fflags;nobuffer|flags;low_delay|probesize;32|analyzeduration;0"
+
+# Set HEADLESS=1 to run without a window (frames are still captured, published and measured)
+HEADLESS = os.getenv("HEADLESS", "0") == "1"
+# Set USE_NVDEC=1 to decode files and RTSP streams on an NVIDIA GPU through ffmpegcv
+USE_NVDEC = os.getenv("USE_NVDEC", "0") == "1"
+
+class _NVDecCapture:
+    """Adapt an ffmpegcv reader to the VideoCapture calls used here."""
+    def __init__(self, reader):
+        self._reader = reader
+        self._frame = None
     
-    # Check if the video source opened successfully
-    if not cap.isOpened():
-        print("Error: Could not open video source.")
+    def isOpened(self):
+        return self._reader.isOpened()
+    
+    def grab(self):
+        # ffmpegcv has no separate grab; NVDEC decodes every frame anyway, so read and hold it
+        try:
+            ret, self._frame = self._reader.read()
+        except Exception:
+            # A released or broken reader: report a failed grab so the caller can reconnect
+            ret, self._frame = False, None
+        return ret
+    
+    def retrieve(self, image=None):
+        return self._frame is not None, self._frame
+    
+    def set(self, prop_id, value):
+        return False  # ffmpegcv takes no capture properties after opening
+    
+    def get(self, prop_id):
+        props = {
+            cv2.CAP_PROP_FRAME_WIDTH: self._reader.width,
+            cv2.CAP_PROP_FRAME_HEIGHT: self._reader.height,
+            cv2.CAP_PROP_FPS: self._reader.fps,
+        }
+        return props.get(prop_id, 0)
+    
+    def release(self):
+        self._reader.release()
+
+def _open_nvdec(url):
+    """Open url with NVDEC hardware decoding, or return None if ffmpegcv or the GPU is unavailable."""
+    try:
+        import ffmpegcv
+        return _NVDecCapture(ffmpegcv.VideoCaptureNV(url, pix_fmt='bgr24'))
+    except Exception as e:
+        logger.warning("NVDEC decoding unavailable (%s); using OpenCV.", e)
+        return None
+
+def _gstreamer_pipeline(url):
+    """Build a low-latency GStreamer pipeline for a network URL, keeping only the newest frame in appsink."""
+    if url.startswith("rtsp://"):
+        source = f"rtspsrc location={url} latency=0"
+    else:
+        source = f"souphttpsrc location={url} is-live=true"
+    return f"{source} ! decodebin ! videoconvert ! appsink drop=true max-buffers=1 sync=false"
+
+@functools.lru_cache(maxsize=4)
+def _capture_plan(url):
+    """
+    List the ways to open url, best first, as (label, source, backend, params) tuples.
+    
+    The list is cached per URL and _open_capture moves the entry that worked to the front,
+    so reopening the same stream skips backends that already failed to open it.
+    """
+    plan = []
+    if USE_NVDEC and (url.startswith("rtsp://") or url.endswith((".mp4", ".mkv"))):
+        plan.append(("NVDEC", url, None, ()))
+    
+    if not url.startswith(("http://", "https://", "rtsp://")):
+        plan.append(("default backend", url, cv2.CAP_ANY, ()))
+        return plan
+    
+    plan.append(("GStreamer", _gstreamer_pipeline(url), cv2.CAP_GSTREAMER, ()))
+    # Ask FFmpeg for whichever hardware decoder the platform has (VA-API, D3D11VA, VideoToolbox, CUDA...)
+    plan.append(("FFmpeg", url, cv2.CAP_FFMPEG, (
+        cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, OPEN_TIMEOUT_MSEC,
+        cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY,
+        cv2.CAP_PROP_HW_DEVICE, 0,
+    )))
+    # A broken hardware setup can fail the open entirely, so retry with software decoding
+    plan.append(("FFmpeg (software decoding)", url, cv2.CAP_FFMPEG, (
+        cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, OPEN_TIMEOUT_MSEC,
+        cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_NONE,
+    )))
+    return plan
+
+def _try_open(source, backend, params):
+    """Open one capture plan entry, returning None if it does not open."""
+    if backend is None:
+        return _open_nvdec(source)
+    if backend == cv2.CAP_FFMPEG:
+        # FFmpeg reads its demuxer options from the environment
+        os.environ.setdefault("OPENCV_FFMPEG_CAPTURE_OPTIONS", FFMPEG_LOW_LATENCY_OPTIONS)
+    cap = cv2.VideoCapture(source, backend, list(params))
+    if cap.isOpened():
+        return cap
+    cap.release()
+    return None
+
+def _open_capture(url):
+    """
+    Open url with the first working entry of its capture plan.
+    
+    :return: (cap, width, height, fps), or None if the source could not be opened
+    """
+    plan = _capture_plan(url)
+    for i, (label, source, backend, params) in enumerate(plan):
+        cap = _try_open(source, backend, params)
+        if cap is None:
+            continue
+        if i:
+            plan.insert(0, plan.pop(i))
+        logger.info("Opened video source with %s", label)
+        if backend == cv2.CAP_FFMPEG:
+            hw_acceleration = int(cap.get(cv2.CAP_PROP_HW_ACCELERATION))
+            logger.info("Hardware acceleration: %s", "none" if hw_acceleration == cv2.VIDEO_ACCELERATION_NONE else hw_acceleration)
+        
+        # Keep only the newest frame buffered so read() does not return stale frames
+        if not cap.set(cv2.CAP_PROP_BUFFERSIZE, 1):
+            logger.warning("Backend ignored CAP_PROP_BUFFERSIZE; frames may lag behind the live stream.")
+        
+        # Get video properties
+        frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        return cap, frame_width, frame_height, fps
+    return None
+
+class _SharedFramePublisher:
+    """
+    Publish frames to a named shared memory segment for another process.
+    
+    The segment starts with a header of five uint64 values: seq, height, width, channels and
+    the pid of the publishing process. The frame bytes follow it. seq is odd while a frame is
+    being written and even once it is complete, so a reader that sees the same even seq before
+    and after copying has a whole frame. The segment is recreated under the same name if the
+    frame shape changes. An existing segment is only replaced when the process that created it
+    is gone. Frames are converted to pix_fmt ('bgr', 'rgb' or 'gray') while being written into
+    the segment.
+    """
+    HEADER_SIZE = 40
+    PID_OFFSET = 32
+    # cvtColor codes for output formats other than the BGR the capture produces
+    CONVERSIONS = {"rgb": cv2.COLOR_BGR2RGB, "gray": cv2.COLOR_BGR2GRAY}
+    
+    def __init__(self, name, pix_fmt="bgr"):
+        self._name = name
+        self._conversion = self.CONVERSIONS.get(pix_fmt)
+        self._shape = None  # Capture frame shape the segment was sized for
+        self._shm = None
+        self._header = None
+        self._data = None
+    
+    def _allocate(self, frame):
+        self.close()
+        self._shape = frame.shape
+        out_shape = frame.shape[:2] if self._conversion == cv2.COLOR_BGR2GRAY else frame.shape
+        size = self.HEADER_SIZE + int(np.prod(out_shape))
+        try:
+            self._shm = shared_memory.SharedMemory(name=self._name, create=True, size=size)
+        except FileExistsError:
+            self._unlink_stale()
+            self._shm = shared_memory.SharedMemory(name=self._name, create=True, size=size)
+        self._header = np.ndarray((5,), dtype=np.uint64, buffer=self._shm.buf)
+        channels = out_shape[2] if len(out_shape) == 3 else 1
+        self._header[:] = (0, out_shape[0], out_shape[1], channels, os.getpid())
+        self._data = np.ndarray(out_shape, dtype=np.uint8, buffer=self._shm.buf, offset=self.HEADER_SIZE)
+        logger.info("Publishing %dx%d frames to shared memory '%s'", frame.shape[1], frame.shape[0], self._name)
+    
+    def _unlink_stale(self):
+        """Unlink a segment left behind by a run that did not shut down cleanly; refuse one a live viewer owns."""
+        existing = shared_memory.SharedMemory(name=self._name)
+        try:
+            owner = struct.unpack_from("=Q", existing.buf, self.PID_OFFSET)[0] if existing.size >= self.HEADER_SIZE else 0
+        finally:
+            existing.close()
+        if _process_alive(owner):
+            raise FileExistsError(f"Shared memory '{self._name}' is in use by process {owner}")
+        logger.warning("Replacing shared memory '%s' left behind by process %d", self._name, owner)
+        existing.unlink()
+    
+    def publish(self, frame):
+        if self._data is None or self._shape != frame.shape:
+            self._allocate(frame)
+        header = self._header
+        header[0] += 1  # Odd: write in progress
+        if self._conversion is None:
+            np.copyto(self._data, frame)
+        else:
+            # Convert straight into the segment; cvtColor's SIMD kernels make this no dearer than the plain copy
+            out = cv2.cvtColor(frame, self._conversion, dst=self._data)
+            if out is not self._data:
+                np.copyto(self._data, out)
+        header[0] += 1
+    
+    def close(self):
+        if self._shm is None:
+            return
+        # Views into the buffer must be dropped before the segment can be closed
+        self._header = None
+        self._data = None
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+def _process_alive(pid):
+    """Whether process pid is still running."""
+    if os.name == "nt":
+        # Windows frees a named segment with its last handle, so one that still exists has a live owner
+        return True
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except PermissionError:
+        return True  # Running under another user
+    except (ProcessLookupError, OverflowError):
+        return False
+    return True
+
+def _pin_current_thread(cpu, role):
+    """Pin the calling thread to one CPU core; only supported on Linux, where pid 0 means the calling thread."""
+    if cpu is None:
         return
+    if not hasattr(os, "sched_setaffinity"):
+        logger.warning("CPU pinning is not supported on this platform; %s thread left unpinned.", role)
+        return
+    try:
+        os.sched_setaffinity(0, {cpu})
+    except OSError as e:
+        logger.warning("Could not pin %s thread to CPU %d: %s", role, cpu, e)
+
+def _reader(stream, frames, stop_event, counters, capture_cpu=None, reopen=None):
+    """
+    Capture on a background thread, keeping only the newest decoded frame in the 1-slot frames queue.
     
-    print(f"Successfully connected to video stream at: {url}")
+    Items are (frame, grab time) tuples; None tells the display loop the stream ended.
+    Frames replaced before the display picked them up are counted in counters["dropped"].
     
-    # Get video properties
-    frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    fps = cap.get(cv2.CAP_PROP_FPS)
+    :param stream: Dict holding the capture under "cap"; replaced there when the stream is reopened
+    :param reopen: Callable returning a new capture or None; when given, a failed read reconnects
+                   with exponential backoff instead of ending the stream
+    """
+    _pin_current_thread(capture_cpu, "capture")
+    frame_interval = 1.0 / TARGET_DISPLAY_FPS
+    last_retrieved = 0.0
+    ring = []
+    # Ring slots of the frame waiting in the queue and of the frame the output last took;
+    # the reader never decodes into either, so the output never sees a frame being overwritten
+    queued = held = None
+    backoff = RECONNECT_MIN_DELAY
+    # Bind per-frame calls to locals so the loop skips attribute lookups
+    grab, retrieve, now = stream["cap"].grab, stream["cap"].retrieve, time.monotonic
+    take, put, stopped = frames.get_nowait, frames.put_nowait, stop_event.is_set
+    try:
+        while not stopped():
+            try:
+                # Advance the stream without decoding until the next frame is due on screen
+                ret = grab()
+                grabbed_at = now()
+                if ret and grabbed_at - last_retrieved < frame_interval:
+                    continue
+                frame = None
+                if ret:
+                    # Decode into a preallocated buffer instead of a fresh array per frame
+                    for slot in range(FRAME_RING_SIZE):
+                        if slot != queued and slot != held:
+                            break
+                    buf = ring[slot] if ring else None
+                    ret, frame = retrieve(buf)
+                    if ret and frame is not buf and (buf is None or frame.shape != buf.shape):
+                        # First frame or a resolution change: OpenCV allocated a new array, so rebuild the ring around it;
+                        # frames already handed out are not part of the new ring
+                        ring = [frame] + [np.empty_like(frame) for _ in range(FRAME_RING_SIZE - 1)]
+                        slot = 0
+                        queued = held = None
+                    last_retrieved = grabbed_at
+            except cv2.error as e:
+                # A backend failure mid-read counts as a failed read, so a live stream reconnects
+                logger.warning("Capture error: %s", e)
+                ret, frame = False, None
+            
+            if not ret and reopen is not None:
+                # Network blip: drop the dead capture, wait, and open the stream again
+                stream["cap"].release()
+                logger.warning("Stream dropped; reconnecting in %.1f s", backoff)
+                if stop_event.wait(backoff):
+                    break
+                backoff = min(backoff * 2, RECONNECT_MAX_DELAY)
+                try:
+                    cap = reopen()
+                except cv2.error as e:
+                    logger.warning("Reconnect failed: %s", e)
+                    cap = None
+                if cap is not None:
+                    stream["cap"] = cap
+                    grab, retrieve = cap.grab, cap.retrieve
+                    logger.info("Reconnected to video stream")
+                continue
+            backoff = RECONNECT_MIN_DELAY
+            if not ret:
+                break
+            
+            # Drop the frame the display has not picked up yet so a slow display never adds latency;
+            # this is the only producer, so the put below always finds the slot free
+            try:
+                take()
+                counters["dropped"] += 1  # Its ring slot is free again
+            except queue.Empty:
+                # The output took the queued frame and with it let go of the one it had before
+                held = queued
+            put((frame, grabbed_at))
+            queued = slot
+    finally:
+        # However the reader ends, tell the display loop so it does not wait for frames forever
+        try:
+            take()
+        except queue.Empty:
+            pass
+        put(None)
+
+@functools.lru_cache(maxsize=None)
+def _gui_available():
+    """Probe once whether this OpenCV build can open windows; headless builds raise cv2.error."""
+    try:
+        cv2.namedWindow('_probe', cv2.WINDOW_NORMAL)
+        cv2.destroyWindow('_probe')
+        return True
+    except cv2.error:
+        return False
+
+def _open_window(window_name):
+    """Create the display window; only called once GUI support is known to exist."""
+    # An OpenGL window makes imshow upload frames as textures instead of repainting through the toolkit
+    try:
+        cv2.namedWindow(window_name, cv2.WINDOW_NORMAL | cv2.WINDOW_OPENGL)
+    except cv2.error:
+        # OpenCV built without OpenGL support
+        cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
+
+def _make_display(window_name):
+    """Build the on_frame callback that shows frames; it returns True when the user presses 'q'."""
+    # Bind per-frame calls to locals so each frame skips attribute lookups
+    show = cv2.imshow
+    wait = cv2.waitKey
+    poll = cv2.pollKey
+    q_key = ord('q')
+    frame_idx = 0
     
-    print(f"Video resolution: {frame_width}x{frame_height}, FPS: {fps}")
+    def display(frame):
+        nonlocal frame_idx
+        # Display the frame
+        show(window_name, frame)
+        
+        # Press 'q' to quit; only every 4th frame pays waitKey's 1 ms sleep, pollKey returns immediately
+        frame_idx += 1
+        key = wait(1) if frame_idx & 3 == 0 else poll()
+        return key & 0xFF == q_key
+    
+    return display
+
+def _discard_frame(frame):
+    """on_frame for headless runs without an output: frames are only measured."""
+    return False
+
+def _reopen_capture(url):
+    """Reopen a dropped stream from the full capture plan, since the backend that had it may be the one failing."""
+    _capture_plan.cache_clear()
+    opened = _open_capture(url)
+    return opened[0] if opened is not None else None
+
+def _run_loop(stream, on_frame, gui=False, capture_cpu=None, gui_cpu=None, reopen=None):
+    """
+    Pass frames from stream["cap"] to on_frame until it returns True, a stop signal arrives or the stream fails.
+    
+    :param stream: Dict holding the capture under "cap"; the reader swaps in a new one when it reconnects
+    :param on_frame: Callback taking each frame; a true return value ends the loop
+    :param gui: Whether a window is open, so key presses are polled while the stream stalls
+    :param reopen: Passed to the reader to reconnect dropped streams instead of ending the loop
+    :return: True if the loop ended because the stream stopped delivering frames
+    """
+    frames = queue.Queue(maxsize=1)
+    stop_event = threading.Event()
+    # Frames the reader replaced unseen, and frames shown later than LATE_FRAME_INTERVALS display intervals after grab
+    counters = {"dropped": 0, "late": 0}
+    reader = threading.Thread(target=_reader, args=(stream, frames, stop_event, counters, capture_cpu, reopen), daemon=True)
+    stream_failed = False
+    previous_handlers = {}
     
     try:
-        # Create a window - only after confirming video source is opened
-        cv2.namedWindow('Video Stream', cv2.WINDOW_NORMAL)
+        # Ctrl+C or a termination request stops the loop cleanly, whether or not a window has focus;
+        # Python only lets the main thread install signal handlers
+        if threading.current_thread() is threading.main_thread():
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                previous_handlers[sig] = signal.signal(sig, lambda *_: stop_event.set())
         
-        while True:
-            # Read a frame from the video source
-            ret, frame = cap.read()
+        # Decode on the reader thread while this thread runs the output
+        reader.start()
+        _pin_current_thread(gui_cpu, "GUI")
+        # Bind per-frame calls to locals so the loop skips attribute lookups
+        get = frames.get
+        now = time.monotonic
+        stopped = stop_event.is_set
+        q_key = ord('q')
+        # Output times and grab-to-output latencies of recent frames, reported every STATS_INTERVAL
+        shown_times = deque(maxlen=STATS_WINDOW)
+        latencies = deque(maxlen=STATS_WINDOW)
+        last_report = now()
+        late_after = LATE_FRAME_INTERVALS / TARGET_DISPLAY_FPS
+        while not stopped():
+            try:
+                item = get(timeout=0.1)
+            except queue.Empty:
+                # Keep the window responsive while the stream stalls
+                if gui and cv2.waitKey(1) & 0xFF == q_key:
+                    break
+                continue
             
             # If frame is not read correctly, break the loop
-            if not ret:
-                print("Error: Failed to receive frame. Stream may have ended.")
+            if item is None:
+                logger.error("Failed to receive frame. Stream may have ended.")
+                stream_failed = True
                 break
+            frame, grabbed_at = item
             
-            # Display the frame
-            cv2.imshow('Video Stream', frame)
+            quit_requested = on_frame(frame)
             
-            # Press 'q' to quit
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            shown_at = now()
+            latency = shown_at - grabbed_at
+            shown_times.append(shown_at)
+            latencies.append(latency)
+            if latency > late_after:
+                counters["late"] += 1
+            if shown_at - last_report >= STATS_INTERVAL and len(shown_times) > 1:
+                fps = (len(shown_times) - 1) / (shown_times[-1] - shown_times[0])
+                latency_ms = 1000 * sum(latencies) / len(latencies)
+                logger.info("FPS: %.1f, grab-to-display latency: %.1f ms, dropped: %d, late: %d",
+                            fps, latency_ms, counters["dropped"], counters["late"])
+                last_report = shown_at
+            
+            if quit_requested:
                 break
                 
     except Exception as e:
-        print(f"Error: {e}")
+        logger.error("Stream error: %s", e)
     finally:
-        # Release the video capture object and close windows
-        cap.release()
-        cv2.destroyAllWindows()
-        print("Stream closed.")
+        # Stop the reader before the capture it is using gets released
+        stop_event.set()
+        if reader.is_alive():
+            reader.join(timeout=1.0)
+        for sig, handler in previous_handlers.items():
+            signal.signal(sig, handler)
+    return stream_failed
+
+def stream_video_from_url(url, capture_cpu=None, gui_cpu=None, shm_name=None, pix_fmt="bgr", on_frame=None):
+    """
+    Stream url to on_frame, to shared memory (shm_name) or to a window, in that order of preference.
+    
+    Without any of those, or when OpenCV has no GUI support, frames are only captured and measured.
+    """
+    # Create a VideoCapture object
+    opened = _open_capture(url)
+    
+    # Check if the video source opened successfully
+    if opened is None:
+        logger.error("Could not open video source.")
+        return
+    cap, frame_width, frame_height, fps = opened
+    
+    logger.info("Successfully connected to video stream at: %s", url)
+    logger.info("Video resolution: %dx%d, FPS: %s", frame_width, frame_height, fps)
+    
+    # Pick the output once, so the frame loop never checks for it per frame
+    window_name = 'Video Stream'
+    publisher = None
+    gui = False
+    if on_frame is None:
+        if shm_name:
+            # With shared memory output the frames go to another process and no window is opened
+            publisher = _SharedFramePublisher(shm_name, pix_fmt)
+            on_frame = publisher.publish
+        elif not HEADLESS and _gui_available():
+            # Create a window - only after confirming video source is opened
+            _open_window(window_name)
+            on_frame = _make_display(window_name)
+            gui = True
+        else:
+            if not HEADLESS:
+                logger.warning("OpenCV has no GUI support; running headless.")
+            on_frame = _discard_frame
+    
+    # Live network streams reconnect on failure; files and local devices end as before
+    reopen = functools.partial(_reopen_capture, url) if url.startswith(("http://", "https://", "rtsp://")) else None
+    stream = {"cap": cap}
+    try:
+        if _run_loop(stream, on_frame, gui, capture_cpu, gui_cpu, reopen):
+            # The backend that opened the stream stopped delivering, so start from the full plan next time
+            _capture_plan.cache_clear()
+    finally:
+        # Release the video capture object (the reader may have replaced it) and close windows
+        stream["cap"].release()
+        if publisher is not None:
+            publisher.close()
+        if gui:
+            cv2.destroyAllWindows()
+        logger.info("Stream closed.")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Display a live video stream.")
+    parser.add_argument("url", nargs="?", help="Video source URL (default: http://localhost:8882/video)")
+    parser.add_argument("--capture-cpu", type=int, help="Pin the capture thread to this CPU core (Linux only)")
+    parser.add_argument("--gui-cpu", type=int, help="Pin the display thread to this CPU core (Linux only)")
+    parser.add_argument("--shm", nargs="?", const="video_stream", metavar="NAME",
+                        help="Publish frames to shared memory NAME (default: video_stream) instead of a window")
+    parser.add_argument("--pix-fmt", choices=("bgr", "rgb", "gray"), default="bgr",
+                        help="Pixel format of frames published with --shm (default: bgr)")
+    args = parser.parse_args()
+    
     # Check if URL is provided as command line argument
-    if len(sys.argv) > 1:
-        url = sys.argv[1]
-    else:
+    url = args.url
+    if url is None:
         # Using your URL from the error message
         url = "http://localhost:8882/video"
-        print("No URL provided. Using: http://localhost:8881/video")
-        print("Usage: python script.py <url>")
+        logger.info("No URL provided. Using: %s", url)
+        logger.info("Usage: python script.py <url>")
     
     # Start streaming
-    stream_video_from_url(url)
\ No newline at end of file
+    stream_video_from_url(url, capture_cpu=args.capture_cpu, gui_cpu=args.gui_cpu, shm_name=args.shm, pix_fmt=args.pix_fmt)
\ No newline at end of file